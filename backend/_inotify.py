@@ -0,0 +1,160 @@
+"""_inotify.py
+
+Minimal inotify(7) wrapper for the --watch loops (ctypes, no pip modules).
+
+Usage:
+
+    with Inotify() as ino:
+        ino.add_watch("/some/dir", IN_CREATE | IN_DELETE)
+        while True:
+            events = wait_for_changes(ino, debounce=0.5)
+            ...
+
+Constructing Inotify raises OSError when inotify is unavailable (non-Linux,
+no libc symbol, fd limits); callers are expected to fall back to polling.
+Watch loops report that as WatchStopped, which is deliberately not an OSError:
+an I/O error from the regeneration callback must not be mistaken for it.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import List, Optional, Tuple
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# (wd, mask, name)
+Event = Tuple[int, int, str]
+
+_libc: Optional[ctypes.CDLL] = None
+
+
+def _load_libc() -> ctypes.CDLL:
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        except (OSError, AttributeError) as e:
+            raise OSError(errno.ENOSYS, f"inotify not available: {e}") from e
+        _libc = libc
+    return _libc
+
+
+class WatchStopped(Exception):
+    """The inotify watch can't be set up or kept going; poll instead."""
+
+
+class Inotify:
+    """An inotify file descriptor (non-blocking, close-on-exec)."""
+
+    def __init__(self) -> None:
+        self._libc = _load_libc()
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self) -> List[Event]:
+        """Drain all queued events without blocking."""
+        events: List[Event] = []
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            if not buf:
+                return events
+
+            pos = 0
+            end = len(buf)
+            while pos + _EVENT.size <= end:
+                wd, mask, _cookie, name_len = _EVENT.unpack_from(buf, pos)
+                pos += _EVENT.size
+                name = buf[pos : pos + name_len].split(b"\0", 1)[0]
+                pos += name_len
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until events are readable (or timeout). Returns True if readable."""
+        r, _w, _x = select.select([self._fd], [], [], timeout)
+        return bool(r)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "Inotify":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+def wait_for_changes(
+    ino: Inotify, debounce: float = 0.0, max_delay: Optional[float] = None
+) -> List[Event]:
+    """Block until at least one event arrives, then coalesce a burst.
+
+    After the first event, keep collecting until `debounce` seconds pass with
+    no new events, so e.g. unpacking an album triggers a single rebuild.
+    With `max_delay`, return at most that long after the first event even if
+    events keep coming (a file rewritten continuously still gets picked up).
+    """
+    ino.wait(None)
+    events = ino.read_events()
+    if debounce <= 0:
+        return events
+
+    now = time.monotonic()
+    deadline = now + debounce
+    cap = now + max_delay if max_delay is not None else None
+    while True:
+        if cap is not None and deadline > cap:
+            deadline = cap
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not ino.wait(remaining):
+            return events + ino.read_events()
+        more = ino.read_events()
+        if more:
+            events += more
+            deadline = time.monotonic() + debounce
@@ -0,0 +1,53 @@
+"""_jsonio.py
+
+Shared JSON output helpers for the backend writers (no pip modules required).
+
+    _atomic_write(path, _dumps(payload, pretty), fsync=False)
+
+_dumps uses orjson when it is installed (several times faster, emits UTF-8
+bytes directly) and the stdlib json module otherwise. Both produce equivalent
+JSON, not identical bytes: some floats are spelled differently (stdlib writes
+1.2e-05 and 8.100000664200054e-06, orjson 0.000012 and 8.100000664200054e-6).
+
+_atomic_write always goes through a temp file + rename so the UI never reads a
+half-written file; fsync is optional since every output can simply be
+regenerated.
+
+(Not named _io.py: that would be shadowed by the builtin _io module.)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj as UTF-8 JSON (compact unless pretty)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+    ).encode("utf-8")
+
+
+def _atomic_write(path: Union[str, Path], data: bytes, fsync: bool = False) -> None:
+    """Replace path with data atomically; fsync the data first if asked."""
+    path = os.fspath(path)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
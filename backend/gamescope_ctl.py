@@ -7,7 +7,9 @@ gamescope exposes several runtime controls via X11 atoms on the Xwayland root
 window. Projects like OpenGamepadUI use these atoms to implement Deck-like
 "Quick Access" controls (FPS limit, scaling, blur, etc.).
 
-This helper intentionally does not depend on python-xlib; it shells out to xprop.
+This helper intentionally does not depend on python-xlib. It talks to libX11
+directly via ctypes when available (one connection, no subprocess), and falls
+back to shelling out to xprop otherwise.
 
 IMPORTANT:
 - This requires an Xwayland DISPLAY.
@@ -23,19 +25,124 @@ Examples:
 from __future__ import annotations
 
 import argparse
+import atexit
+import ctypes
 import os
 import subprocess
 import sys
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def _run(cmd: List[str]) -> int:
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # xprop's stdout is never used; only keep stderr for error reporting.
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
     if proc.returncode != 0:
         sys.stderr.write(proc.stderr)
     return proc.returncode
 
 
+# Xlib constants (X.h / Xatom.h).
+_XA_CARDINAL = 6
+_XA_STRING = 31
+_PROP_MODE_REPLACE = 0
+
+# xprop format spec -> (property type, format bits)
+_XPROP_FORMATS = {
+    "32c": (_XA_CARDINAL, 32),
+    "8s": (_XA_STRING, 8),
+}
+
+
+class _XConn:
+    """Lazily opened libX11 connection to the root window (ctypes)."""
+
+    _instance: Optional["_XConn"] = None
+    _failed = False
+
+    def __init__(self, xlib: Any, dpy: int) -> None:
+        self.xlib = xlib
+        self.dpy = dpy
+        self.root = xlib.XDefaultRootWindow(dpy)
+        self._atoms: Dict[str, int] = {}
+
+    @classmethod
+    def get(cls) -> Optional["_XConn"]:
+        if cls._instance is not None or cls._failed:
+            return cls._instance
+        cls._failed = True
+
+        if not os.environ.get("DISPLAY"):
+            return None
+        try:
+            xlib = ctypes.CDLL("libX11.so.6")
+        except OSError:
+            return None
+
+        c_ulong = ctypes.c_ulong
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.restype = c_ulong
+        xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        xlib.XInternAtom.restype = c_ulong
+        xlib.XChangeProperty.argtypes = [
+            ctypes.c_void_p,
+            c_ulong,
+            c_ulong,
+            c_ulong,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_int,
+        ]
+        xlib.XDeleteProperty.argtypes = [ctypes.c_void_p, c_ulong, c_ulong]
+        xlib.XFlush.argtypes = [ctypes.c_void_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+
+        dpy = xlib.XOpenDisplay(None)
+        if not dpy:
+            return None
+
+        conn = cls(xlib, dpy)
+        atexit.register(conn.close)
+        cls._instance = conn
+        cls._failed = False
+        return conn
+
+    def atom(self, name: str) -> int:
+        a = self._atoms.get(name)
+        if a is None:
+            a = self.xlib.XInternAtom(self.dpy, name.encode("utf-8"), 0)
+            self._atoms[name] = a
+        return a
+
+    def set_many(self, ops: List[Tuple[str, str, str]]) -> None:
+        for name, fmt, value in ops:
+            prop_type, bits = _XPROP_FORMATS[fmt]
+            if bits == 32:
+                # Xlib expects format-32 data as C longs.
+                data: Any = (ctypes.c_ulong * 1)(int(value))
+                n = 1
+            else:
+                raw = value.encode("utf-8")
+                data = ctypes.create_string_buffer(raw, len(raw))
+                n = len(raw)
+            self.xlib.XChangeProperty(
+                self.dpy, self.root, self.atom(name), prop_type, bits, _PROP_MODE_REPLACE, data, n
+            )
+        self.xlib.XFlush(self.dpy)
+
+    def remove(self, name: str) -> None:
+        self.xlib.XDeleteProperty(self.dpy, self.root, self.atom(name))
+        self.xlib.XFlush(self.dpy)
+
+    def close(self) -> None:
+        if self.dpy:
+            self.xlib.XCloseDisplay(self.dpy)
+            self.dpy = 0
+            _XConn._instance = None
+
+
 def _xprop_root(args: List[str]) -> int:
     # Keep env; rely on DISPLAY.
     if not os.environ.get("DISPLAY"):
@@ -44,16 +151,36 @@ def _xprop_root(args: List[str]) -> int:
     return _run(["xprop", "-root"] + args)
 
 
+def _xprop_batch(ops: List[Tuple[str, str, str]]) -> int:
+    """Set several root atoms at once (libX11 if available, else one xprop call).
+
+    ops is a list of (atom, format, value), e.g. ("GAMESCOPE_FSR", "32c", "1").
+    """
+    conn = _XConn.get()
+    if conn is not None:
+        conn.set_many(ops)
+        return 0
+
+    args: List[str] = []
+    for atom, fmt, value in ops:
+        args += ["-f", atom, fmt, "-set", atom, value]
+    return _xprop_root(args)
+
+
 def _set_u32(atom: str, value: int) -> int:
     # 32-bit cardinal
-    return _xprop_root(["-f", atom, "32c", "-set", atom, str(int(value))])
+    return _xprop_batch([(atom, "32c", str(int(value)))])
 
 
 def _set_str(atom: str, value: str) -> int:
-    return _xprop_root(["-f", atom, "8s", "-set", atom, value])
+    return _xprop_batch([(atom, "8s", value)])
 
 
 def _remove(atom: str) -> int:
+    conn = _XConn.get()
+    if conn is not None:
+        conn.remove(atom)
+        return 0
     return _xprop_root(["-remove", atom])
 
 
@@ -81,10 +208,13 @@ def cmd_set_scaler(mode: str) -> int:
 
 def cmd_set_fsr(enabled: bool) -> int:
     # Some versions use a scaler string; others expose a bool atom.
-    # We set both to be safe.
-    rc1 = cmd_set_scaler("fsr" if enabled else "auto")
-    rc2 = _set_u32("GAMESCOPE_FSR", 1 if enabled else 0)
-    return rc1 if rc1 != 0 else rc2
+    # We set both to be safe, in one xprop call.
+    return _xprop_batch(
+        [
+            ("GAMESCOPE_SCALER", "8s", "fsr" if enabled else "auto"),
+            ("GAMESCOPE_FSR", "32c", "1" if enabled else "0"),
+        ]
+    )
 
 
 def cmd_set_fsr_sharpness(sharpness: int) -> int:
@@ -28,6 +28,8 @@ Schema:
 Notes:
 - "albums" is simply a folder grouping (subfolders under root).
 - Title is derived from filename (no tags).
+- Directory listings are cached next to the output (<out>.cache.json) so
+  rescans only re-read folders whose mtime changed.
 
 """
 
@@ -35,43 +37,107 @@ from __future__ import annotations
 
 import argparse
 import datetime as _dt
+import errno
 import json
 import os
 import re
 import sys
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from _inotify import (
+    IN_CREATE,
+    IN_DELETE,
+    IN_DELETE_SELF,
+    IN_ISDIR,
+    IN_MOVE_SELF,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_ONLYDIR,
+    IN_Q_OVERFLOW,
+    Inotify,
+    WatchStopped,
+    wait_for_changes,
+)
+from _jsonio import _atomic_write, _dumps
 
 
 AUDIO_EXTS = {"flac", "mp3", "ogg", "opus", "m4a", "aac", "wav"}
 
+_DIR_CACHE_VERSION = 1
+
 
 def _utc_iso() -> str:
     return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 
-_cleanup = re.compile(r"\s+")
-
+_TRACK_PREFIX = re.compile(r"^\d+\s*[-._]\s*")
+_TITLE_TRANS = str.maketrans({"_": " ", ".": " "})
 
-def _title_from_filename(name: str) -> str:
-    # Remove extension and common track number prefixes.
-    base = Path(name).stem
-    base = re.sub(r"^\d+\s*[-._]\s*", "", base)
-    base = base.replace("_", " ")
-    base = base.replace(".", " ")
-    base = _cleanup.sub(" ", base).strip()
-    return base or Path(name).stem
 
+def _stem(name: str) -> str:
+    # Same as Path(name).stem, without building a Path.
+    i = name.rfind(".")
+    return name[:i] if 0 < i < len(name) - 1 else name
 
-def _write_json(path: str, payload: Dict) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, path)
 
+def _title_from_filename(name: str) -> str:
+    # Remove extension and common track number prefixes.
+    stem = _stem(name)
+    m = _TRACK_PREFIX.match(stem)
+    base = stem[m.end() :] if m else stem
+    # str.split() collapses whitespace runs in C.
+    base = " ".join(base.translate(_TITLE_TRANS).split())
+    return base or stem
+
+
+def _scan_dir(dirpath: str) -> Tuple[List[str], List[List[str]]]:
+    """Return (subdir names, [[file name, title, ext], ...]) for audio files in dirpath."""
+    subdirs: List[str] = []
+    files: List[List[str]] = []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            fn = entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                subdirs.append(fn)
+                continue
 
-def build_index(root: Path) -> Dict:
+            ext_pos = fn.rfind(".")
+            ext = fn[ext_pos + 1 :].lower() if ext_pos >= 0 else ""
+            if ext not in AUDIO_EXTS:
+                continue
+            files.append([fn, _title_from_filename(fn), ext])
+    return subdirs, files
+
+
+def _load_dir_cache(cache_path: str) -> Dict[str, list]:
+    if not cache_path:
+        return {}
+    try:
+        with open(cache_path, "rb") as f:
+            data = json.loads(f.read())
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _DIR_CACHE_VERSION:
+        return {}
+    dirs = data.get("dirs")
+    return dirs if isinstance(dirs, dict) else {}
+
+
+def build_index(root: Path, cache_path: str = "") -> Dict:
+    """Scan root into the JSON payload.
+
+    With cache_path, per-directory listings are persisted there and reused on
+    the next scan for every directory whose mtime is unchanged (adding,
+    removing or renaming an entry always bumps the parent's mtime, and titles
+    only depend on file names), so a rescan costs one stat per directory
+    instead of a readdir + title parse per file.
+    """
     payload: Dict = {
         "generated_at": _utc_iso(),
         "root": str(root),
@@ -88,60 +154,167 @@ def build_index(root: Path) -> Dict:
 
     albums: Dict[str, Dict] = {}
 
-    # Walk
-    for dirpath, _dirnames, filenames in os.walk(root):
-        d = Path(dirpath)
-        rel_dir = os.path.relpath(d, root)
-        # Use "." to represent the root itself.
-        album_id = "" if rel_dir == "." else rel_dir
-
-        for fn in filenames:
-            ext = fn.rsplit(".", 1)[-1].lower() if "." in fn else ""
-            if ext not in AUDIO_EXTS:
-                continue
-            full_path = d / fn
+    prev_dirs = _load_dir_cache(cache_path)
+    new_dirs: Dict[str, list] = {}
+    # Don't trust listings of directories modified within the last second:
+    # a change in the same mtime tick as our scan would go unnoticed.
+    trust_before = time.time_ns() - 1_000_000_000
+
+    # Walk (explicit stack over scandir; DirEntry avoids per-file stat/Path).
+    stack = [(str(root), "")]
+    while stack:
+        dirpath, album_id = stack.pop()
+        try:
+            mtime_ns = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue
+
+        hit = prev_dirs.get(dirpath)
+        if hit and hit[0] == mtime_ns and mtime_ns < trust_before:
+            subdirs, files = hit[1], hit[2]
+        else:
             try:
-                rel_path = str(full_path.relative_to(root))
-            except Exception:
-                rel_path = str(full_path)
-
-            album = albums.get(album_id)
-            if album is None:
-                title = "Local" if album_id == "" else album_id
-                album = {
-                    "id": album_id,
-                    "title": title,
-                    "tracks": [],
-                }
-                albums[album_id] = album
-
-            album["tracks"].append(
-                {
-                    "id": rel_path,
-                    "title": _title_from_filename(fn),
-                    "path": str(full_path),
-                    "ext": ext,
-                }
-            )
-
-    # Sort albums and tracks
-    def album_sort_key(a: Dict) -> str:
-        return (a.get("id") or "").lower()
-
+                subdirs, files = _scan_dir(dirpath)
+            except OSError:
+                continue
+        new_dirs[dirpath] = [mtime_ns, subdirs, files]
+        prefix = dirpath if dirpath.endswith("/") else dirpath + "/"
+
+        for d in subdirs:
+            stack.append((prefix + d, album_id + "/" + d if album_id else d))
+
+        if not files:
+            continue
+
+        # "" represents the root itself.
+        album = albums.get(album_id)
+        if album is None:
+            title = "Local" if album_id == "" else album_id
+            # Tracks are accumulated as parallel lists and only turned
+            # into dicts once, after sorting.
+            album = {
+                "id": album_id,
+                "title": title,
+                "_ids": [],
+                "_titles": [],
+                "_keys": [],
+                "_paths": [],
+                "_exts": [],
+            }
+            albums[album_id] = album
+
+        for fn, title, ext in files:
+            album["_ids"].append(album_id + "/" + fn if album_id else fn)
+            album["_titles"].append(title)
+            album["_keys"].append(title.lower())
+            album["_paths"].append(prefix + fn)
+            album["_exts"].append(ext)
+
+    if cache_path and new_dirs != prev_dirs:
+        try:
+            # Regenerable internal cache: compact, and not worth an fsync.
+            data = _dumps({"version": _DIR_CACHE_VERSION, "dirs": new_dirs})
+            _atomic_write(cache_path, data)
+        except OSError:
+            pass
+
+    # Sort albums and tracks. Sort keys are precomputed, so ordering tracks is
+    # a C-level key lookup rather than a Python lambda call per track.
     out_albums: List[Dict] = list(albums.values())
     for a in out_albums:
-        a["tracks"].sort(key=lambda t: (t.get("title") or "").lower())
-        a["track_count"] = len(a["tracks"])
-
-    out_albums.sort(key=album_sort_key)
+        ids = a.pop("_ids")
+        titles = a.pop("_titles")
+        keys = a.pop("_keys")
+        paths = a.pop("_paths")
+        exts = a.pop("_exts")
+        order = sorted(range(len(ids)), key=keys.__getitem__)
+        a["tracks"] = [
+            {"id": ids[k], "title": titles[k], "path": paths[k], "ext": exts[k]}
+            for k in order
+        ]
+        a["track_count"] = len(order)
+
+    out_albums.sort(key=lambda a: a["id"].lower())
     payload["albums"] = out_albums
     return payload
 
 
+def _resolve_root(root_path: str) -> Path:
+    return Path(root_path).expanduser() if root_path else Path("~/Music").expanduser()
+
+
 def run_once(out_path: str, root_path: str) -> None:
-    root = Path(root_path).expanduser() if root_path else Path("~/Music").expanduser()
-    payload = build_index(root)
-    _write_json(out_path, payload)
+    payload = build_index(_resolve_root(root_path), cache_path=out_path + ".cache.json")
+    _atomic_write(out_path, _dumps(payload, pretty=True), fsync=True)
+
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF
+
+
+def _add_watches(ino: Inotify, root: str) -> None:
+    """Watch root and every directory below it (inotify is not recursive).
+
+    A subdirectory that vanishes (or is replaced) between scandir and
+    add_watch is skipped; any creation that follows triggers a resync. Errors
+    on the root itself, and ENOSPC (watch limit reached), are raised.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            ino.add_watch(d, _WATCH_MASK | IN_ONLYDIR)
+        except OSError as e:
+            if d != root and e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                continue
+            raise
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            pass
+
+
+def _watch_inotify(out_path: str, root_path: str) -> None:
+    """Rebuild only when something under the music root changes.
+
+    Raises WatchStopped when inotify can't be used (or the root goes away), so
+    the caller can fall back to polling. Errors from rebuilding propagate.
+    """
+    root = _resolve_root(root_path)
+    try:
+        ino = Inotify()
+    except OSError as e:
+        raise WatchStopped(f"inotify unavailable: {e}") from e
+
+    with ino:
+        try:
+            _add_watches(ino, str(root))
+        except OSError as e:
+            raise WatchStopped(e) from e
+        run_once(out_path, root_path)
+
+        while True:
+            try:
+                events = wait_for_changes(ino, debounce=0.5)
+            except OSError as e:
+                raise WatchStopped(e) from e
+            new_dirs = False
+            for _wd, mask, _name in events:
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_Q_OVERFLOW):
+                    new_dirs = True
+                elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    new_dirs = True
+            if new_dirs:
+                if not root.is_dir():
+                    raise WatchStopped(f"Music root went away: {root}")
+                # add_watch on an already-watched dir is a cheap no-op.
+                try:
+                    _add_watches(ino, str(root))
+                except OSError as e:
+                    raise WatchStopped(e) from e
+            run_once(out_path, root_path)
 
 
 def main(argv: List[str]) -> int:
@@ -150,12 +323,19 @@ def main(argv: List[str]) -> int:
     ap.add_argument("--root", default="")
     ap.add_argument("--watch", action="store_true")
     ap.add_argument("--interval", type=float, default=10.0)
+    ap.add_argument("--no-inotify", action="store_true", help="Always poll in --watch mode")
     args = ap.parse_args(argv)
 
     if not args.watch:
         run_once(args.out, args.root)
         return 0
 
+    if not args.no_inotify:
+        try:
+            _watch_inotify(args.out, args.root)
+        except WatchStopped as e:
+            sys.stderr.write(f"local_music: inotify watch stopped ({e}); polling every {args.interval}s\n")
+
     while True:
         run_once(args.out, args.root)
         time.sleep(max(2.0, float(args.interval)))
@@ -44,6 +44,7 @@ import argparse
 import datetime as _dt
 import json
 import os
+import shutil
 import sqlite3
 import subprocess
 import sys
@@ -51,21 +52,83 @@ import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from _jsonio import _atomic_write, _dumps
+
 
 def _utc_iso() -> str:
     return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 
+# Try a few invocations; Lutris CLI options have varied across versions.
+_CLI_CANDIDATES: List[List[str]] = [
+    ["lutris", "--list-games", "--json"],
+    ["lutris", "-l", "--json"],
+    ["lutris", "--list-games"],
+    ["lutris", "-l"],
+]
+
+_LUTRIS_BIN = shutil.which("lutris")
+
+# The invocation that last produced a parseable game list. Persisted so cold
+# starts (and every --watch tick) skip probing the failing candidates.
+_WORKING_CMD: Optional[List[str]] = None
+_WORKING_CMD_PATH = Path(os.path.expanduser("~")) / ".cache" / "miyashell" / "lutris_cmd"
+
+
+def _load_working_cmd() -> Optional[List[str]]:
+    try:
+        cmd = json.loads(_WORKING_CMD_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return cmd if cmd in _CLI_CANDIDATES else None
+
+
+def _save_working_cmd(cmd: List[str]) -> None:
+    try:
+        _WORKING_CMD_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _WORKING_CMD_PATH.write_text(json.dumps(cmd), encoding="utf-8")
+    except Exception:
+        pass
+
+
+def _parse_cli_output(out: str) -> Optional[List[Dict[str, Any]]]:
+    # Non-JSON output: can't reliably parse.
+    if not (out.startswith("{") or out.startswith("[")):
+        return None
+
+    try:
+        data = json.loads(out)
+    except Exception:
+        return None
+
+    # Common shapes: list[...] or {"games": [...]}
+    if isinstance(data, list):
+        return [g for g in data if isinstance(g, dict)]
+    if isinstance(data, dict):
+        games = data.get("games")
+        if isinstance(games, list):
+            return [g for g in games if isinstance(g, dict)]
+        # Sometimes the CLI returns a dict keyed by id.
+        vals = list(data.values())
+        if vals and all(isinstance(v, dict) for v in vals):
+            return vals  # type: ignore[return-value]
+    return None
+
+
 def _run_cli() -> Optional[List[Dict[str, Any]]]:
     """Return Lutris game list from CLI as a list of dicts, or None."""
+    global _WORKING_CMD
+
+    if _LUTRIS_BIN is None:
+        return None
+
+    if _WORKING_CMD is None:
+        _WORKING_CMD = _load_working_cmd()
 
-    # Try a few invocations; Lutris CLI options have varied across versions.
-    candidates: List[List[str]] = [
-        ["lutris", "--list-games", "--json"],
-        ["lutris", "-l", "--json"],
-        ["lutris", "--list-games"],
-        ["lutris", "-l"],
-    ]
+    candidates = list(_CLI_CANDIDATES)
+    if _WORKING_CMD is not None:
+        candidates.remove(_WORKING_CMD)
+        candidates.insert(0, _WORKING_CMD)
 
     for cmd in candidates:
         try:
@@ -85,28 +148,14 @@ def _run_cli() -> Optional[List[Dict[str, Any]]]:
         if not out:
             continue
 
-        # If it's JSON, parse it.
-        if out.startswith("{") or out.startswith("["):
-            try:
-                data = json.loads(out)
-            except Exception:
-                continue
-
-            # Common shapes: list[...] or {"games": [...]}
-            if isinstance(data, list):
-                return [g for g in data if isinstance(g, dict)]
-            if isinstance(data, dict):
-                games = data.get("games")
-                if isinstance(games, list):
-                    return [g for g in games if isinstance(g, dict)]
-                # Sometimes the CLI returns a dict keyed by id.
-                vals = list(data.values())
-                if vals and all(isinstance(v, dict) for v in vals):
-                    return vals  # type: ignore[return-value]
+        games = _parse_cli_output(out)
+        if games is None:
             continue
 
-        # Non-JSON output: can't reliably parse.
-        continue
+        if cmd != _WORKING_CMD:
+            _WORKING_CMD = cmd
+            _save_working_cmd(cmd)
+        return games
 
     return None
 
@@ -121,8 +170,11 @@ def _sql_tables(conn: sqlite3.Connection) -> List[str]:
     return [r[0] for r in cur.fetchall() if isinstance(r[0], str)]
 
 
-def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
-    cur = conn.execute(f"PRAGMA table_info({table})")
+def _table_columns(conn: sqlite3.Connection, table: str, tables: List[str]) -> List[str]:
+    # PRAGMA can't bind identifiers; only accept names sqlite_master reported.
+    if table not in tables:
+        return []
+    cur = conn.execute(f'PRAGMA table_info("{table}")')
     cols: List[str] = []
     for _cid, name, _type, _notnull, _dflt, _pk in cur.fetchall():
         if isinstance(name, str):
@@ -130,18 +182,72 @@ def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
     return cols
 
 
-def _run_sqlite() -> Optional[List[Dict[str, Any]]]:
-    """Return Lutris game list from local DB as a list of dicts, or None."""
+# Read-only connection reused across --watch polls, keyed by the DB file's
+# (st_dev, st_ino) so a replaced pga.db gets reopened.
+_SQLITE_CONN: Optional[sqlite3.Connection] = None
+_SQLITE_CONN_ID: Optional[Tuple[int, int]] = None
+
+
+def _close_sqlite() -> None:
+    global _SQLITE_CONN, _SQLITE_CONN_ID
+    if _SQLITE_CONN is not None:
+        try:
+            _SQLITE_CONN.close()
+        except Exception:
+            pass
+    _SQLITE_CONN = None
+    _SQLITE_CONN_ID = None
+
+
+def _sqlite_conn(db: Path) -> Optional[sqlite3.Connection]:
+    """Return the memoized read-only connection to db, opening it if needed."""
+    global _SQLITE_CONN, _SQLITE_CONN_ID
 
-    db = _guess_lutris_db_path()
-    if not db.exists():
+    try:
+        st = db.stat()
+    except OSError:
+        _close_sqlite()
         return None
 
+    ident = (st.st_dev, st.st_ino)
+    if _SQLITE_CONN is not None and _SQLITE_CONN_ID == ident:
+        return _SQLITE_CONN
+
+    _close_sqlite()
     try:
-        conn = sqlite3.connect(str(db))
+        conn = sqlite3.connect(
+            db.as_uri() + "?mode=ro",
+            uri=True,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=67108864")
     except Exception:
         return None
 
+    _SQLITE_CONN = conn
+    _SQLITE_CONN_ID = ident
+    return conn
+
+
+def _run_sqlite(conn: Optional[sqlite3.Connection] = None) -> Optional[List[Dict[str, Any]]]:
+    """Return Lutris game list from local DB as a list of dicts, or None.
+
+    Uses `conn` if given, otherwise a memoized read-only connection to the
+    default pga.db that stays open between calls.
+    """
+
+    owned = conn is None
+    if conn is None:
+        db = _guess_lutris_db_path()
+        if not db.exists():
+            return None
+        conn = _sqlite_conn(db)
+        if conn is None:
+            return None
+
     try:
         tables = _sql_tables(conn)
         if not tables:
@@ -157,7 +263,7 @@ def _run_sqlite() -> Optional[List[Dict[str, Any]]]:
         if not table:
             return None
 
-        cols = _table_columns(conn, table)
+        cols = _table_columns(conn, table, tables)
         if not cols:
             return None
 
@@ -184,13 +290,24 @@ def _run_sqlite() -> Optional[List[Dict[str, Any]]]:
             if not select_cols:
                 return None
 
+        # Let SQLite sort, on the same display name the loop below derives
+        # (empty/NULL names become "Lutris Game <id>").
+        sorted_in_sql = "name" in select_cols
         sql = f"SELECT {', '.join(select_cols)} FROM {table}"
+        if sorted_in_sql:
+            id_col = next((c for c in ("id", "game_id") if c in select_cols), "")
+            order_key = f"COALESCE(NULLIF(name, ''), 'Lutris Game ' || {id_col})" if id_col else "name"
+            sql += f" ORDER BY {order_key} COLLATE NOCASE"
         cur = conn.execute(sql)
         rows = cur.fetchall()
 
         games: List[Dict[str, Any]] = []
+        # NOCASE only folds ASCII, so check the result against the casefold
+        # order used elsewhere (one pass) and re-sort only if it disagrees.
+        in_order = True
+        prev_key = ""
         for row in rows:
-            raw: Dict[str, Any] = {select_cols[i]: row[i] for i in range(len(select_cols))}
+            raw: Dict[str, Any] = dict(row)
 
             # Normalize
             gid = raw.get("id")
@@ -207,6 +324,11 @@ def _run_sqlite() -> Optional[List[Dict[str, Any]]]:
             runner = str(raw.get("runner") or "")
             platform = str(raw.get("platform") or "")
 
+            key = name.casefold()
+            if key < prev_key:
+                in_order = False
+            prev_key = key
+
             installed_val = raw.get("installed")
             if installed_val is None:
                 installed_val = raw.get("is_installed")
@@ -224,22 +346,16 @@ def _run_sqlite() -> Optional[List[Dict[str, Any]]]:
                 }
             )
 
-        # Sort by name
-        games.sort(key=lambda g: str(g.get("name", "")).casefold())
+        # Sort by name (schemas without a name column, or non-ASCII case folds)
+        if not sorted_in_sql or not in_order:
+            games.sort(key=lambda g: str(g.get("name", "")).casefold())
         return games
 
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-
-
-def _write_json(path: Path, payload: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    except Exception:
+        # Don't keep a connection around that just failed.
+        if owned:
+            _close_sqlite()
+        raise
 
 
 def generate() -> Dict[str, Any]:
@@ -298,7 +414,8 @@ def main() -> int:
 
     def do_once() -> None:
         payload = generate()
-        _write_json(out, payload)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(out, _dumps(payload, pretty=True), fsync=True)
 
     do_once()
 
@@ -26,13 +26,18 @@ Output JSON schema (stable-ish):
   "installed": ["GE-Proton10-28", "GE-Proton10-27"],
   "update_available": true,
   "last_notified": "GE-Proton10-28",
-  "last_error": ""
+  "last_error": "",
+  "_http_etag": "W/\"...\"",
+  "_http_last_modified": "..."
 }
 
 Notes:
 - Steam also supports external compatibility tools via compatibilitytools.d.
   After installing/updating a custom tool, you usually need to restart Steam
   to see it in the Compatibility dropdown.
+- Release polling is conditional (If-None-Match / If-Modified-Since) using the
+  validators stored in the "_http_*" keys; set GITHUB_TOKEN to raise the API
+  rate limit.
 - We do NOT attempt to modify Steam's default Proton selection (too fragile).
 """
 
@@ -47,12 +52,15 @@ import shutil
 import subprocess
 import tarfile
 import tempfile
+import threading
 import time
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
 import requests
 
+from _jsonio import _atomic_write, _dumps
+
 
 def _utc_iso() -> str:
     return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
@@ -65,13 +73,6 @@ def _read_json(path: Path) -> Dict[str, Any]:
         return {}
 
 
-def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    tmp.replace(path)
-
-
 def _notify(summary: str, body: str) -> None:
     """Best-effort desktop notification."""
     try:
@@ -85,15 +86,39 @@ def _notify(summary: str, body: str) -> None:
         pass
 
 
-def _github_latest_release(repo: str, timeout: float = 10.0) -> Dict[str, Any]:
+def _github_latest_release(
+    repo: str,
+    timeout: float = 10.0,
+    etag: str = "",
+    last_modified: str = "",
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, str]]:
+    """Fetch the latest release, conditionally if validators are given.
+
+    Returns (release_json, validators). release_json is None when GitHub
+    answered 304 Not Modified (which also doesn't count against the rate limit).
+    """
     url = f"https://api.github.com/repos/{repo}/releases/latest"
     headers = {
         "Accept": "application/vnd.github+json",
         "User-Agent": "MiyaShell-ProtonGE-Updater",
     }
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    token = os.environ.get("GITHUB_TOKEN", "").strip()
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
     r = requests.get(url, headers=headers, timeout=timeout)
+    validators = {
+        "etag": str(r.headers.get("ETag") or etag),
+        "last_modified": str(r.headers.get("Last-Modified") or last_modified),
+    }
+    if r.status_code == 304:
+        return None, validators
     r.raise_for_status()
-    return r.json()
+    return r.json(), validators
 
 
 def _pick_ge_tarball(release_json: Dict[str, Any]) -> Optional[Tuple[str, str]]:
@@ -128,62 +153,197 @@ def _discover_install_dir(override: str | None = None) -> Path:
     return candidates[0]
 
 
+# Archives are unpacked into a hidden dir of this prefix inside install_dir and
+# only moved into place once complete, so a failed install leaves nothing a
+# GE-Proton* scan (or Steam) could mistake for a working tool.
+_STAGING_PREFIX = ".miyashell-extract-"
+
 _GE_DIR_RE = re.compile(r"^GE-Proton\d+\-\d+.*$")
+_NUM_RE = re.compile(r"\d+")
+
 
+def _installed_versions(install_dir: Path, _cache: Optional[Dict[Any, list[str]]] = None) -> list[str]:
+    """List installed GE-Proton folders, newest first.
 
-def _installed_versions(install_dir: Path) -> list[str]:
-    if not install_dir.is_dir():
+    When `_cache` is given, results are memoized by the directory's mtime so
+    repeated calls within one run don't rescan an unchanged directory.
+    """
+    try:
+        st = os.stat(install_dir)
+    except OSError:
         return []
 
+    key = (str(install_dir), st.st_mtime_ns)
+    if _cache is not None and key in _cache:
+        return list(_cache[key])
+
     vers: list[str] = []
-    for child in install_dir.iterdir():
-        if not child.is_dir():
-            continue
-        name = child.name
-        if _GE_DIR_RE.match(name) or name.startswith("GE-Proton"):
-            vers.append(name)
-
-    # Sort by "natural-ish" numeric order (best-effort)
-    def key(v: str):
-        nums = re.findall(r"\d+", v)
-        return [int(x) for x in nums] + [v]
-
-    vers.sort(key=key, reverse=True)
+    try:
+        with os.scandir(install_dir) as it:
+            for entry in it:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                name = entry.name
+                if name.startswith(_STAGING_PREFIX):
+                    continue
+                if _GE_DIR_RE.match(name) or name.startswith("GE-Proton"):
+                    vers.append(name)
+    except OSError:
+        return []
+
+    # Sort by "natural-ish" numeric order (best-effort). Decorate once so the
+    # regex runs per version rather than per comparison.
+    decorated = [([int(x) for x in _NUM_RE.findall(v)], v) for v in vers]
+    decorated.sort(reverse=True)
+    vers = [v for _, v in decorated]
+
+    if _cache is not None:
+        _cache.clear()
+        _cache[key] = vers
+        return list(vers)
     return vers
 
 
-def _download_to(url: str, dest: Path, timeout: float = 30.0) -> None:
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    with requests.get(url, stream=True, timeout=timeout) as r:
-        r.raise_for_status()
-        with open(dest, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
+# tarfile extraction filters exist on 3.12+ (and security backports of 3.8-3.11).
+_HAS_TAR_FILTERS = hasattr(tarfile, "tar_filter")
 
 
-def _extract_tarball(tar_path: Path, install_dir: Path) -> str:
-    """Extract tarball into install_dir. Returns top-level folder name."""
-    install_dir.mkdir(parents=True, exist_ok=True)
+def _ge_filter(member: tarfile.TarInfo, dest_path: str) -> Optional[tarfile.TarInfo]:
+    """Extraction filter: tarfile's "tar" policy, minus bundled docs.
 
-    with tarfile.open(tar_path, "r:gz") as tf:
-        # Determine the top-level directory name.
-        top_dirs = set()
-        for m in tf.getmembers():
-            parts = m.name.split("/", 1)
-            if parts and parts[0]:
-                top_dirs.add(parts[0])
-        top = sorted(top_dirs)[0] if top_dirs else ""
+    Not the stricter "data" policy: that rejects every symlink with an absolute
+    target, and Proton's default Wine prefix ships dosdevices/z: -> /. The
+    "tar" policy still refuses absolute or escaping member paths (resolved
+    through already-extracted symlinks) and strips setuid/setgid bits.
+    """
+    member = tarfile.tar_filter(member, dest_path)  # type: ignore[attr-defined]
+    name = member.name
+    if "/docs/" in name and name.endswith((".md", ".txt")):
+        return None
+    return member
 
-        tf.extractall(path=install_dir)
+
+def _publish_staged(staging: Path, install_dir: Path) -> None:
+    """Move the extracted top-level entries of `staging` into install_dir."""
+    for entry in os.scandir(staging):
+        dest = install_dir / entry.name
+        # A leftover of the same name (e.g. an older broken install) is replaced.
+        if dest.is_dir() and not dest.is_symlink():
+            shutil.rmtree(dest)
+        os.replace(entry.path, dest)
+
+
+def _remove_stale_staging(install_dir: Path, max_age: float = 6 * 3600) -> None:
+    """Remove staging dirs left behind by a killed run (older than max_age)."""
+    now = time.time()
+    try:
+        with os.scandir(install_dir) as it:
+            stale = [
+                e.path
+                for e in it
+                if e.name.startswith(_STAGING_PREFIX)
+                and e.is_dir(follow_symlinks=False)
+                and now - e.stat(follow_symlinks=False).st_mtime > max_age
+            ]
+    except OSError:
+        return
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _extract_tar_stream(fileobj: Any, dest: Path) -> str:
+    """Extract a gzip tar stream into dest. Returns top-level folder name.
+
+    Uses tarfile's streaming mode ("r|gz"), so `fileobj` only has to support
+    read() - it is never rewound. `dest` should be a staging dir: on error it
+    holds a partial tree, which the caller discards.
+    """
+    # Single pass: the top-level folder is captured from the first member that
+    # has one (skipping a leading "./" entry some tar tools emit).
+    top = ""
+    # errorlevel=1: filter rejections and OS errors raise (at 0 they'd only be
+    # logged, and the member silently skipped from an otherwise "good" install).
+    with tarfile.open(fileobj=fileobj, mode="r|gz", errorlevel=1) as tf:
+        for m in tf:
+            if not top:
+                name = m.name[2:] if m.name.startswith("./") else m.name
+                top = name.split("/", 1)[0]
+                if top == ".":
+                    top = ""
+            if _HAS_TAR_FILTERS:
+                try:
+                    tf.extract(m, path=dest, filter=_ge_filter)
+                except tarfile.FilterError as e:  # type: ignore[attr-defined]
+                    # Unsafe member (absolute or escaping path): the whole
+                    # archive is rejected and the staging dir discarded.
+                    raise RuntimeError(f"Refusing unsafe archive member: {e}") from e
+            else:
+                tf.extract(m, path=dest)
 
     return top
 
 
-def _maybe_prune_old(install_dir: Path, keep: int) -> None:
+def _download_and_extract(url: str, install_dir: Path, timeout: float = 30.0) -> str:
+    """Stream a release tarball from `url` and install it into install_dir.
+
+    No intermediate file is written. A background thread pumps the response
+    body into a pipe while this thread decompresses and extracts from the
+    other end, so network transfer and gzip/disk work overlap. Extraction goes
+    to a staging dir that is moved into place only once the download has
+    completed cleanly; on any error it is removed and install_dir is left
+    untouched. Returns the top-level folder name.
+    """
+    install_dir.mkdir(parents=True, exist_ok=True)
+    _remove_stale_staging(install_dir)
+    staging = Path(tempfile.mkdtemp(dir=install_dir, prefix=_STAGING_PREFIX))
+
+    try:
+        with requests.get(url, stream=True, timeout=timeout) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+
+            r_fd, w_fd = os.pipe()
+            errors: list[BaseException] = []
+
+            def pump() -> None:
+                try:
+                    with os.fdopen(w_fd, "wb") as w:
+                        shutil.copyfileobj(r.raw, w, 1024 * 1024)
+                except BaseException as e:
+                    errors.append(e)
+
+            t = threading.Thread(target=pump, name="protonge-download", daemon=True)
+            t.start()
+
+            try:
+                with os.fdopen(r_fd, "rb") as rf:
+                    top = _extract_tar_stream(rf, staging)
+                    # Drain trailing padding so the writer isn't left blocked.
+                    while rf.read(1024 * 1024):
+                        pass
+            except Exception:
+                # Closing our end unblocks the writer (EPIPE). A download
+                # failure is the root cause of a truncated archive, so prefer
+                # reporting it. The partial tree is discarded below.
+                t.join()
+                if errors and not isinstance(errors[0], BrokenPipeError):
+                    raise errors[0]
+                raise
+
+            t.join()
+            if errors:
+                raise errors[0]
+
+        _publish_staged(staging, install_dir)
+        return top
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _maybe_prune_old(install_dir: Path, keep: int, _cache: Optional[Dict[Any, list[str]]] = None) -> None:
     if keep <= 0:
         return
-    installed = _installed_versions(install_dir)
+    installed = _installed_versions(install_dir, _cache)
     for old in installed[keep:]:
         try:
             shutil.rmtree(install_dir / old)
@@ -213,15 +373,38 @@ def run_once(
         "last_error": "",
     }
 
+    # Memoizes _installed_versions by install_dir mtime for this run.
+    versions_cache: Dict[Any, list[str]] = {}
+
+    # Only revalidate against a previous result for the same repo.
+    prev_latest = prev.get("latest") if prev.get("repo") == repo else None
+    if not isinstance(prev_latest, dict) or not prev_latest.get("tag") or not prev_latest.get("asset_url"):
+        prev_latest = None
+
     try:
-        rel = _github_latest_release(repo)
-        tag = str(rel.get("tag_name") or "")
-        pub = str(rel.get("published_at") or "")
-        pick = _pick_ge_tarball(rel)
-        if not tag or not pick:
-            raise RuntimeError("Could not find GE-Proton tar.gz asset in latest release")
-
-        asset_name, asset_url = pick
+        rel, validators = _github_latest_release(
+            repo,
+            etag=str(prev.get("_http_etag") or "") if prev_latest else "",
+            last_modified=str(prev.get("_http_last_modified") or "") if prev_latest else "",
+        )
+        payload["_http_etag"] = validators["etag"]
+        payload["_http_last_modified"] = validators["last_modified"]
+
+        if rel is None and prev_latest is not None:
+            # 304 Not Modified: the previous release info is still current.
+            tag = str(prev_latest.get("tag") or "")
+            asset_name = str(prev_latest.get("asset_name") or "")
+            asset_url = str(prev_latest.get("asset_url") or "")
+            pub = str(prev_latest.get("published_at") or "")
+        else:
+            rel = rel or {}
+            tag = str(rel.get("tag_name") or "")
+            pub = str(rel.get("published_at") or "")
+            pick = _pick_ge_tarball(rel)
+            if not tag or not pick:
+                raise RuntimeError("Could not find GE-Proton tar.gz asset in latest release")
+            asset_name, asset_url = pick
+
         payload["latest"] = {
             "tag": tag,
             "asset_name": asset_name,
@@ -229,7 +412,7 @@ def run_once(
             "published_at": pub,
         }
 
-        installed = _installed_versions(install_dir)
+        installed = _installed_versions(install_dir, versions_cache)
         payload["installed"] = installed
 
         update_available = tag not in installed
@@ -240,21 +423,17 @@ def run_once(
             payload["last_notified"] = tag
 
         if update_available and auto_install:
-            # Download and extract.
-            with tempfile.TemporaryDirectory(prefix="miyashell-protonge-") as td:
-                td_path = Path(td)
-                tar_path = td_path / asset_name
-                _download_to(asset_url, tar_path)
-                top = _extract_tarball(tar_path, install_dir)
-
-            # Refresh installed list.
-            installed = _installed_versions(install_dir)
+            # Download and extract in a single streaming pass.
+            top = _download_and_extract(asset_url, install_dir)
+
+            # Refresh installed list (the extract bumped the dir mtime).
+            installed = _installed_versions(install_dir, versions_cache)
             payload["installed"] = installed
             payload["update_available"] = tag not in installed
 
             if keep > 0:
-                _maybe_prune_old(install_dir, keep=keep)
-                payload["installed"] = _installed_versions(install_dir)
+                _maybe_prune_old(install_dir, keep=keep, _cache=versions_cache)
+                payload["installed"] = _installed_versions(install_dir, versions_cache)
 
             if notify:
                 _notify("MiyaShell", f"Installed Proton-GE: {tag} (restart Steam)")
@@ -266,7 +445,8 @@ def run_once(
     except Exception as e:
         payload["last_error"] = str(e)
 
-    _write_json_atomic(out_path, payload)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(out_path, _dumps(payload, pretty=True), fsync=True)
     return payload
 
 
@@ -39,32 +39,44 @@ Designed to be dependency-free.
 from __future__ import annotations
 
 import argparse
-import datetime as _dt
-import json
+import os
+import re
+import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from _inotify import WatchStopped
+from _jsonio import _atomic_write, _dumps
 
 # Reuse the KeyValues parser + Steam discovery logic from steam_library.py
-from steam_library import discover_library_paths, find_steam_root, load_keyvalues_file, _int
+from steam_library import (
+    DEFAULT_JOBS,
+    discover_library_paths,
+    find_steam_root,
+    load_keyvalues_files,
+    watch_manifests,
+    _int,
+    _iter_manifests,
+    _latest_manifest_mtime,
+    _read_file,
+)
 
 
 def _utc_iso() -> str:
-    return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-def _extract_appstate(manifest: Path) -> Dict[str, Any] | None:
-    try:
-        kv = load_keyvalues_file(manifest)
-    except Exception:
+def _appstate_of(kv: Dict[str, Any] | None) -> Dict[str, Any] | None:
+    if kv is None:
         return None
-
     appstate = kv.get("AppState")
     if not isinstance(appstate, dict):
         return None
     return appstate
 
 
-def _maybe_download_entry(appstate: Dict[str, Any], library_path: Path) -> Dict[str, Any] | None:
+def _maybe_download_entry(appstate: Dict[str, Any], library_path: str) -> Dict[str, Any] | None:
     appid = _int(appstate.get("appid"), 0)
     if not appid:
         return None
@@ -89,7 +101,7 @@ def _maybe_download_entry(appstate: Dict[str, Any], library_path: Path) -> Dict[
     return {
         "appid": appid,
         "name": name,
-        "library_path": str(library_path),
+        "library_path": library_path,
         "bytes_downloaded": bytes_downloaded,
         "bytes_to_download": bytes_to_download,
         "bytes_to_stage": bytes_to_stage,
@@ -99,24 +111,79 @@ def _maybe_download_entry(appstate: Dict[str, Any], library_path: Path) -> Dict[
     }
 
 
-def generate() -> Dict[str, Any]:
+# The pending-bytes fields, straight off the raw manifest text. Mirrors what
+# tokenize_keyvalues accepts: key and value quoted or bare, any (or no)
+# whitespace between them.
+_DL_RE = re.compile(
+    rb'(?<![^\s{}"])"?(BytesToDownload|BytesToStage)"?\s*(?:"([^"]*)"|([^\s{}"]+))'
+)
+
+# path -> (st_mtime_ns, st_size, verdict of _may_be_downloading)
+_PENDING_CACHE: Dict[str, Tuple[int, int, bool]] = {}
+
+
+def _may_be_downloading(path: str) -> bool:
+    """Cheap pre-check: False only if the manifest has no pending bytes.
+
+    Most installed apps are idle, so this spares them the full KeyValues
+    parse. Anything the regex can't rule out says True and gets the full
+    parse in generate(): non-numeric values, and manifests where no
+    BytesToDownload key was found at all.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+
+    hit = _PENDING_CACHE.get(path)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    try:
+        data = _read_file(path)
+    except OSError:
+        return False
+    pending = False
+    saw_to_download = False
+    for m in _DL_RE.finditer(data):
+        if m.group(1) == b"BytesToDownload":
+            saw_to_download = True
+        value = m.group(2) if m.group(2) is not None else m.group(3)
+        if _int(value.decode("ascii", "replace"), 1) > 0:
+            pending = True
+            break
+    if not saw_to_download:
+        pending = True
+    _PENDING_CACHE[path] = (st.st_mtime_ns, st.st_size, pending)
+    return pending
+
+
+def generate(jobs: int = DEFAULT_JOBS) -> Dict[str, Any]:
     steam_root = find_steam_root()
     libs = discover_library_paths(steam_root)
 
     downloads: List[Dict[str, Any]] = []
 
+    manifests: List[Tuple[str, str]] = []
+    seen = set()
     for lib in libs:
-        steamapps = lib / "steamapps"
-        if not steamapps.is_dir():
-            continue
+        for entry in _iter_manifests(os.path.join(lib, "steamapps")):
+            seen.add(entry.path)
+            if _may_be_downloading(entry.path):
+                manifests.append((lib, entry.path))
+
+    for stale in [k for k in _PENDING_CACHE if k not in seen]:
+        del _PENDING_CACHE[stale]
 
-        for mf in steamapps.glob("appmanifest_*.acf"):
-            appstate = _extract_appstate(mf)
-            if not appstate:
-                continue
-            entry = _maybe_download_entry(appstate, lib)
-            if entry:
-                downloads.append(entry)
+    kvs = load_keyvalues_files([mf for _lib, mf in manifests], jobs=jobs)
+
+    for (lib, _mf), kv in zip(manifests, kvs):
+        appstate = _appstate_of(kv)
+        if not appstate:
+            continue
+        entry = _maybe_download_entry(appstate, lib)
+        if entry:
+            downloads.append(entry)
 
     # Sort: highest progress first, then name
     downloads.sort(key=lambda d: (-float(d.get("progress", 0.0)), str(d.get("name", "")).casefold()))
@@ -133,40 +200,37 @@ def main() -> int:
     ap.add_argument("--out", required=True, help="Path to write downloads.json")
     ap.add_argument("--watch", action="store_true", help="Poll and rewrite when manifests change")
     ap.add_argument("--interval", type=float, default=2.0, help="Poll interval for --watch")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Threads for reading manifests (1 = serial)")
+    ap.add_argument("--pretty", action="store_true", help="Indent the JSON output (for humans)")
+    ap.add_argument("--fsync", action="store_true", help="fsync each write (durable, but slower)")
     args = ap.parse_args()
 
     out_path = Path(args.out).expanduser()
 
     def write_once() -> None:
-        payload = generate()
+        payload = generate(jobs=args.jobs)
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
-        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-        tmp.replace(out_path)
+        _atomic_write(out_path, _dumps(payload, pretty=args.pretty), fsync=args.fsync)
 
     write_once()
 
     if not args.watch:
         return 0
 
-    # Watch: rewrite when manifests change.
+    # Watch: rewrite when manifests change (inotify, falling back to polling).
     steam_root = find_steam_root()
+    try:
+        watch_manifests(steam_root, write_once)
+    except KeyboardInterrupt:
+        return 0
+    except WatchStopped as e:
+        sys.stderr.write(f"steam_downloads: inotify watch stopped ({e}); polling every {args.interval}s\n")
+
     libs = discover_library_paths(steam_root)
     last_mtime = 0.0
     try:
-        import time
-
         while True:
-            mt = 0.0
-            for lib in libs:
-                steamapps = lib / "steamapps"
-                if not steamapps.is_dir():
-                    continue
-                for mf in steamapps.glob("appmanifest_*.acf"):
-                    try:
-                        mt = max(mt, mf.stat().st_mtime)
-                    except Exception:
-                        pass
+            mt = _latest_manifest_mtime(libs)
 
             if mt > last_mtime:
                 last_mtime = mt
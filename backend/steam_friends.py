@@ -7,7 +7,14 @@ Steam does not offer an official local IPC API for friends/chat that is stable
 for third-party clients. The officially documented way to fetch friends
 presence is the Steam Web API.
 
-This script is intentionally dependency-free.
+This script is intentionally dependency-free. If aiohttp happens to be
+installed it is used for the HTTP calls; otherwise urllib3 if installed, else
+urllib.
+
+Friend summaries are fetched in batches of 100 steamids (the
+GetPlayerSummaries limit), concurrently. In --watch mode connections are kept
+alive between ticks (except with plain urllib) and requests are conditional
+(If-None-Match) when the API returned an ETag.
 
 Config (either is fine):
   - CLI args: --api-key, --steamid
@@ -41,25 +48,88 @@ Output schema:
 from __future__ import annotations
 
 import argparse
-import datetime as _dt
+import asyncio
+import atexit
 import json
 import os
 import sys
 import time
+import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from _jsonio import _atomic_write, _dumps
+
+try:
+    import aiohttp  # optional: faster concurrent summaries
+except ImportError:
+    aiohttp = None
+
+try:
+    import urllib3  # optional: pooled keep-alive connections for _http_json
+except ImportError:
+    urllib3 = None
 
 
 def _utc_iso() -> str:
-    return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+# GetPlayerSummaries accepts at most 100 steamids per call.
+_SUMMARY_BATCH = 100
+_MAX_CONCURRENCY = 8
+
+
+# Shared across calls (and the to_thread workers) so requests to
+# api.steampowered.com reuse TLS connections; None means plain urllib.
+_POOL: Any = None
+if urllib3 is not None:
+    _POOL = urllib3.PoolManager(
+        num_pools=1,
+        maxsize=_MAX_CONCURRENCY,
+        retries=urllib3.Retry(total=3, backoff_factor=0.3),
+        timeout=10,
+        headers={"User-Agent": "miyashell/0.1"},
+    )
+
+
+# url -> (ETag, parsed JSON) of the last 200 response, for conditional GETs
+# across --watch ticks. Pruned to the URLs used by the latest fetch.
+_HTTP_CACHE: Dict[str, Tuple[str, Dict[str, Any]]] = {}
 
 
 def _http_json(url: str) -> Dict[str, Any]:
-    req = urllib.request.Request(url, headers={"User-Agent": "miyashell/0.1"})
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = resp.read().decode("utf-8", errors="replace")
-    return json.loads(data)
+    headers = {"User-Agent": "miyashell/0.1"}
+    cached = _HTTP_CACHE.get(url)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    if _POOL is not None:
+        r = _POOL.request("GET", url, headers=headers)
+        if r.status == 304 and cached:
+            return cached[1]
+        if r.status >= 400:
+            raise urllib.error.HTTPError(url, r.status, r.reason or "", r.headers, None)
+        obj = json.loads(r.data.decode("utf-8", errors="replace"))
+        etag = r.headers.get("ETag") or ""
+        if etag:
+            _HTTP_CACHE[url] = (etag, obj)
+        return obj
+
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            etag = resp.headers.get("ETag") or ""
+            data = resp.read().decode("utf-8", errors="replace")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached[1]
+        raise
+    obj = json.loads(data)
+    if etag:
+        _HTTP_CACHE[url] = (etag, obj)
+    return obj
 
 
 _STATE = {
@@ -79,78 +149,147 @@ def _s(x: Any) -> str:
     return str(x)
 
 
-def fetch_friends(api_key: str, steamid64: str) -> List[Dict[str, Any]]:
+def _chunks(seq: List[str], n: int) -> List[List[str]]:
+    return [seq[i : i + n] for i in range(0, len(seq), n)]
+
+
+def _friend_entry(p: Any) -> Dict[str, Any] | None:
+    if not isinstance(p, dict):
+        return None
+    sid = p.get("steamid")
+    if not sid:
+        return None
+
+    state = int(p.get("personastate", 0) or 0)
+    gameserverip = _s(p.get("gameserverip"))
+    if gameserverip == "0.0.0.0:0":
+        gameserverip = ""
+
+    return {
+        "provider": "steam",
+        "steamid": _s(sid),
+        "name": _s(p.get("personaname")),
+        "avatar": _s(p.get("avatarfull") or p.get("avatarmedium") or p.get("avatar")),
+        "persona_state": state,
+        "status": _STATE.get(state, "offline"),
+        "game_name": _s(p.get("gameextrainfo")),
+        "game_id": _s(p.get("gameid")) if p.get("gameid") else "",
+        # join helpers (best-effort)
+        "server_ip": gameserverip,
+        "server_steamid": _s(p.get("gameserversteamid")) if p.get("gameserversteamid") else "",
+        "lobby_id": _s(p.get("lobbysteamid")) if p.get("lobbysteamid") else "",
+    }
+
+
+# Event loop + aiohttp session kept for the life of the process, so --watch
+# ticks reuse the pooled keep-alive connection instead of a new TLS handshake.
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SESSION: Any = None
+
+
+def _close_session() -> None:
+    global _LOOP, _SESSION
+    if _LOOP is None:
+        return
+    if _SESSION is not None:
+        _LOOP.run_until_complete(_SESSION.close())
+        _SESSION = None
+    _LOOP.close()
+    _LOOP = None
+
+
+def _get_session() -> Any:
+    global _SESSION
+    if aiohttp is None:
+        return None
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            headers={"User-Agent": "miyashell/0.1"},
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+    return _SESSION
+
+
+async def _fetch_friends_async(api_key: str, steamid64: str) -> List[Dict[str, Any]]:
     base = "https://api.steampowered.com"
+    sem = asyncio.Semaphore(_MAX_CONCURRENCY)
+    session = _get_session()
+    used: List[str] = []
+
+    async def get_json(url: str) -> Dict[str, Any]:
+        used.append(url)
+        async with sem:
+            if session is None:
+                # Stdlib fallback: blocking urllib calls, overlapped on threads.
+                return await asyncio.to_thread(_http_json, url)
+
+            cached = _HTTP_CACHE.get(url)
+            headers = {"If-None-Match": cached[0]} if cached else None
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304 and cached:
+                    return cached[1]
+                resp.raise_for_status()
+                obj = await resp.json(content_type=None)
+                etag = resp.headers.get("ETag") or ""
+                if etag:
+                    _HTTP_CACHE[url] = (etag, obj)
+                return obj
 
-    # 1) Friend list
-    url1 = (
-        base
-        + "/ISteamUser/GetFriendList/v0001/?"
-        + urllib.parse.urlencode(
-            {
-                "key": api_key,
-                "steamid": steamid64,
-                "relationship": "friend",
-            }
+    try:
+        # 1) Friend list
+        url1 = (
+            base
+            + "/ISteamUser/GetFriendList/v0001/?"
+            + urllib.parse.urlencode(
+                {
+                    "key": api_key,
+                    "steamid": steamid64,
+                    "relationship": "friend",
+                }
+            )
         )
-    )
-    j1 = _http_json(url1)
-    fl = j1.get("friendslist", {}).get("friends", [])
-    ids = [f.get("steamid") for f in fl if isinstance(f, dict) and f.get("steamid")]
-    ids = [i for i in ids if isinstance(i, str)]
-
-    if not ids:
-        return []
-
-    # 2) Summaries (presence, avatar, game)
-    url2 = (
-        base
-        + "/ISteamUser/GetPlayerSummaries/v0002/?"
-        + urllib.parse.urlencode({"key": api_key, "steamids": ",".join(ids)})
-    )
-    j2 = _http_json(url2)
-    players = j2.get("response", {}).get("players", [])
+        j1 = await get_json(url1)
+        fl = j1.get("friendslist", {}).get("friends", [])
+        ids = [f.get("steamid") for f in fl if isinstance(f, dict) and f.get("steamid")]
+        ids = [i for i in ids if isinstance(i, str)]
+
+        if not ids:
+            return []
+
+        # 2) Summaries (presence, avatar, game), in concurrent batches of 100.
+        urls = [
+            base
+            + "/ISteamUser/GetPlayerSummaries/v0002/?"
+            + urllib.parse.urlencode({"key": api_key, "steamids": ",".join(batch)})
+            for batch in _chunks(ids, _SUMMARY_BATCH)
+        ]
+        pages = await asyncio.gather(*[get_json(u) for u in urls])
+    finally:
+        for stale in [u for u in _HTTP_CACHE if u not in used]:
+            del _HTTP_CACHE[stale]
 
     out: List[Dict[str, Any]] = []
-    for p in players:
-        if not isinstance(p, dict):
-            continue
-        sid = p.get("steamid")
-        if not sid:
-            continue
-
-        state = int(p.get("personastate", 0) or 0)
-        gameserverip = _s(p.get("gameserverip"))
-        if gameserverip == "0.0.0.0:0":
-            gameserverip = ""
-
-        out.append(
-            {
-                "provider": "steam",
-                "steamid": _s(sid),
-                "name": _s(p.get("personaname")),
-                "avatar": _s(p.get("avatarfull") or p.get("avatarmedium") or p.get("avatar")),
-                "persona_state": state,
-                "status": _STATE.get(state, "offline"),
-                "game_name": _s(p.get("gameextrainfo")),
-                "game_id": _s(p.get("gameid")) if p.get("gameid") else "",
-                # join helpers (best-effort)
-                "server_ip": gameserverip,
-                "server_steamid": _s(p.get("gameserversteamid")) if p.get("gameserversteamid") else "",
-                "lobby_id": _s(p.get("lobbysteamid")) if p.get("lobbysteamid") else "",
-            }
-        )
+    for j2 in pages:
+        for p in j2.get("response", {}).get("players", []):
+            entry = _friend_entry(p)
+            if entry:
+                out.append(entry)
 
     # Sort: online first, then alphabetical
     out.sort(key=lambda x: (0 if x.get("persona_state", 0) else 1, (x.get("name") or "").lower()))
     return out
 
 
-def write_json(path: str, payload: Dict[str, Any]) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, path)
+def fetch_friends(api_key: str, steamid64: str) -> List[Dict[str, Any]]:
+    global _LOOP
+    if _LOOP is None:
+        _LOOP = asyncio.new_event_loop()
+        atexit.register(_close_session)
+    return _LOOP.run_until_complete(_fetch_friends_async(api_key, steamid64))
+
+
+def write_json(path: str, payload: Dict[str, Any], pretty: bool = False, fsync: bool = False) -> None:
+    _atomic_write(path, _dumps(payload, pretty=pretty), fsync=fsync)
 
 
 def _resolve_creds(cli_api: str, cli_sid: str) -> Tuple[str, str]:
@@ -159,7 +298,7 @@ def _resolve_creds(cli_api: str, cli_sid: str) -> Tuple[str, str]:
     return api_key, sid64
 
 
-def run_once(out_path: str, cli_api: str, cli_sid: str) -> None:
+def run_once(out_path: str, cli_api: str, cli_sid: str, pretty: bool = False, fsync: bool = False) -> None:
     api_key, sid64 = _resolve_creds(cli_api, cli_sid)
 
     payload: Dict[str, Any] = {
@@ -171,17 +310,17 @@ def run_once(out_path: str, cli_api: str, cli_sid: str) -> None:
 
     if not api_key or not sid64:
         payload["error"] = "Missing Steam Web API credentials (steamApiKey / steamId64)."
-        write_json(out_path, payload)
+        write_json(out_path, payload, pretty=pretty, fsync=fsync)
         return
 
     try:
         friends = fetch_friends(api_key, sid64)
         payload["source"] = "webapi"
         payload["friends"] = friends
-        write_json(out_path, payload)
+        write_json(out_path, payload, pretty=pretty, fsync=fsync)
     except Exception as e:
         payload["error"] = f"Steam Web API failed: {e.__class__.__name__}: {e}"
-        write_json(out_path, payload)
+        write_json(out_path, payload, pretty=pretty, fsync=fsync)
 
 
 def main(argv: List[str]) -> int:
@@ -191,14 +330,16 @@ def main(argv: List[str]) -> int:
     ap.add_argument("--steamid", default="")
     ap.add_argument("--watch", action="store_true")
     ap.add_argument("--interval", type=float, default=10.0)
+    ap.add_argument("--pretty", action="store_true")
+    ap.add_argument("--fsync", action="store_true")
     args = ap.parse_args(argv)
 
     if not args.watch:
-        run_once(args.out, args.api_key, args.steamid)
+        run_once(args.out, args.api_key, args.steamid, pretty=args.pretty, fsync=args.fsync)
         return 0
 
     while True:
-        run_once(args.out, args.api_key, args.steamid)
+        run_once(args.out, args.api_key, args.steamid, pretty=args.pretty, fsync=args.fsync)
         time.sleep(max(1.0, float(args.interval)))
 
 
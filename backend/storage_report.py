@@ -11,8 +11,9 @@ We report, per Steam library folder:
 - Filesystem total/used/free (from statvfs)
 - Best-effort Steam usage (size of common Steam subdirs)
 
-NOTE: Computing exact folder sizes can be expensive. We default to "du -sb"
-when available (fast, implemented in C), otherwise fall back to a Python walk.
+NOTE: Computing exact folder sizes can be expensive. We walk each folder with
+os.scandir (no subprocess, DirEntry avoids extra Path objects); sizes are
+apparent file sizes, like "du -sb".
 
 Output JSON:
 {
@@ -34,23 +35,23 @@ Output JSON:
 from __future__ import annotations
 
 import argparse
-import datetime as _dt
-import json
 import os
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Tuple
 
+from _jsonio import _atomic_write, _dumps
 from steam_library import discover_library_paths, find_steam_root
 
 
 def _utc_iso() -> str:
-    return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-def _statvfs_bytes(path: Path) -> Tuple[int, int, int]:
+def _statvfs_bytes(path: str) -> Tuple[int, int, int]:
     """Return (total, used, free) bytes for filesystem containing path."""
-    st = os.statvfs(str(path))
+    st = os.statvfs(path)
     total = st.f_frsize * st.f_blocks
     free = st.f_frsize * st.f_bavail
     used = total - (st.f_frsize * st.f_bfree)
@@ -58,59 +59,97 @@ def _statvfs_bytes(path: Path) -> Tuple[int, int, int]:
 
 
 def _du_bytes(path: Path) -> int:
-    """Return directory size in bytes (best-effort)."""
+    """Return directory size in bytes (best-effort, apparent file sizes)."""
     if not path.exists():
         return 0
 
-    # Prefer du -sb if present.
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    return total
+
+
+# Sizes of rarely-changing subdirs from earlier --watch ticks:
+# path -> (dir st_mtime_ns, bytes, time.monotonic() of the walk).
+_DU_CACHE: Dict[str, Tuple[int, int, float]] = {}
+
+# A dir's mtime only moves when its direct entries change, so files updated
+# deeper down go unnoticed; re-walk cached dirs at least this often anyway.
+_DU_MAX_AGE = 300.0
+
+# Churn constantly while games run / download: always walked.
+_DU_UNCACHED = frozenset({"compatdata", "shadercache", "downloading"})
+
+
+def _du_bytes_cached(path: Path) -> int:
+    """_du_bytes, reusing the last result while the dir's mtime is unchanged."""
+    key = str(path)
     try:
-        proc = subprocess.run(
-            ["du", "-sb", str(path)],
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        )
-        if proc.returncode == 0 and proc.stdout:
-            head = proc.stdout.strip().split("\t", 1)[0]
-            return int(head)
-    except Exception:
-        pass
+        mtime_ns = os.stat(key).st_mtime_ns
+    except OSError:
+        _DU_CACHE.pop(key, None)
+        return 0
 
-    # Fallback: Python walk (slower).
-    total = 0
-    for root, _dirs, files in os.walk(str(path)):
-        for fn in files:
-            fp = Path(root) / fn
-            try:
-                total += fp.stat().st_size
-            except Exception:
-                pass
-    return int(total)
+    now = time.monotonic()
+    hit = _DU_CACHE.get(key)
+    if hit is not None and hit[0] == mtime_ns and now - hit[2] < _DU_MAX_AGE:
+        return hit[1]
+
+    size = _du_bytes(path)
+    _DU_CACHE[key] = (mtime_ns, size, now)
+    return size
+
+
+_SUBDIRS = ("common", "compatdata", "shadercache", "workshop", "downloading")
 
+DEFAULT_JOBS = len(_SUBDIRS)
 
-def generate() -> Dict:
+
+def _subdir_bytes(path: Path) -> int:
+    return (_du_bytes if path.name in _DU_UNCACHED else _du_bytes_cached)(path)
+
+
+def generate(jobs: int = DEFAULT_JOBS) -> Dict:
+    """Build the report payload.
+
+    The subdir walks are independent trees and run on up to `jobs` threads;
+    use 1 on spinning disks, where the seeks don't overlap.
+    """
     steam_root = find_steam_root()
     libs = discover_library_paths(steam_root)
 
+    paths = [Path(lib, "steamapps", name) for lib in libs for name in _SUBDIRS]
+    if jobs <= 1 or len(paths) <= 1:
+        sizes = [_subdir_bytes(p) for p in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(paths))) as ex:
+            sizes = list(ex.map(_subdir_bytes, paths))
+
     libraries = []
 
-    for lib in libs:
+    for i, lib in enumerate(libs):
         fs_total, fs_used, fs_free = _statvfs_bytes(lib)
 
-        steamapps = lib / "steamapps"
-        breakdown = {
-            "common": _du_bytes(steamapps / "common"),
-            "compatdata": _du_bytes(steamapps / "compatdata"),
-            "shadercache": _du_bytes(steamapps / "shadercache"),
-            "workshop": _du_bytes(steamapps / "workshop"),
-            "downloading": _du_bytes(steamapps / "downloading"),
-        }
+        n = len(_SUBDIRS)
+        breakdown = dict(zip(_SUBDIRS, sizes[i * n : (i + 1) * n]))
         steam_bytes = sum(int(v) for v in breakdown.values())
 
         libraries.append(
             {
-                "path": str(lib),
+                "path": lib,
                 "fs_total": fs_total,
                 "fs_used": fs_used,
                 "fs_free": fs_free,
@@ -132,16 +171,17 @@ def main() -> int:
     ap.add_argument("--out", required=True, help="Path to write storage.json")
     ap.add_argument("--watch", action="store_true", help="Refresh periodically")
     ap.add_argument("--interval", type=float, default=15.0, help="Refresh interval for --watch")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Threads for walking Steam dirs (1 = serial)")
+    ap.add_argument("--pretty", action="store_true", help="Indent the JSON output (for humans)")
+    ap.add_argument("--fsync", action="store_true", help="fsync each write (durable, but slower)")
     args = ap.parse_args()
 
     out_path = Path(args.out).expanduser()
 
     def write_once() -> None:
-        payload = generate()
+        payload = generate(jobs=args.jobs)
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
-        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-        tmp.replace(out_path)
+        _atomic_write(out_path, _dumps(payload, pretty=args.pretty), fsync=args.fsync)
 
     write_once()
 
@@ -149,8 +189,6 @@ def main() -> int:
         return 0
 
     try:
-        import time
-
         while True:
             time.sleep(float(args.interval))
             write_once()